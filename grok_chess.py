@@ -1,19 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import tkinter.font as tkfont
 import chess
 import chess.engine
+import chess.pgn
 import chess.polyglot
-import copy
 import time
-import ollama
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import random
 import os
 from datetime import datetime
-from dotenv import load_dotenv
+import importlib.util
 import logging
-from functools import lru_cache
+import logging.handlers
+import queue
+import atexit
 import re
+import sqlite3
+from collections import OrderedDict
 
 # Configuration dictionary for easy customization
 CONFIG = {
@@ -25,49 +30,156 @@ CONFIG = {
         "medium": {"depth": 10, "time": 2.0},
         "hard": {"depth": 15, "time": 5.0}
     },
-    "ollama": {"temperature": 0.3, "top_p": 0.8, "num_predict": 8, "timeout": 30.0},
+    "ollama": {"temperature": 0.3, "top_p": 0.8, "num_predict": 8, "num_ctx": 1024, "timeout": 30.0,
+               "keep_alive": "30m"},
     "transposition_table_size": 1000,
-    "gui": {"min_size": (700, 500), "bg": "#2c3e50", "panel_width": 250},
-    "paths": {"openings": "openings.bin"}
+    "auto_queen": False,  # Promote straight to a queen instead of asking
+    "search": {"time": 1.0, "max_depth": 4},  # Built-in alpha-beta fallback when Stockfish is unavailable
+    "gui": {"min_size": (700, 500), "bg": "#2c3e50", "panel_width": 250, "ui_poll_ms": 16},
+    "paths": {"openings": "openings.bin", "transposition_db": "transposition.db"}
 }
 
+# Patterns for parsing Ollama replies, compiled once at import
+MOVE_RE = re.compile(r'Move: ([a-h][1-8][a-h][1-8][qrbn]?)\n')
+EXPLANATION_RE = re.compile(r'Explanation: (.+?)(?:\n|$)', re.DOTALL)
+EXPLANATION_LINE_RE = re.compile(r'Explanation: .+\n')
+
+# Prompt sent to Ollama for each AI move; filled in per position by query_ollama_move.
+# The fixed instructions come first so the server can reuse their cached prefix between moves.
+OLLAMA_PROMPT = (
+    "You are playing chess. Select the best legal move for the side to move "
+    "and explain why it is the best move in 1-2 sentences.\n"
+    "Respond in the format:\n"
+    "Move: <UCI move>\n"
+    "Explanation: <1-2 sentence explanation>\n"
+    "Example:\n"
+    "Move: e2e4\n"
+    "Explanation: This move controls the center and opens lines for the queen and bishop.\n"
+    "Do NOT include additional text or punctuation outside this format.\n"
+    "\n"
+    "Side to move: {side}\n"
+    "Recent moves: {recent_moves}\n"
+    "Legal moves in UCI format: {legal_moves}\n"
+    "Current position (FEN): {fen}\n"
+)
+
+# Board glyphs indexed by piece_type for White and piece_type + 6 for Black
+PIECE_GLYPHS = ['', '♙', '♘', '♗', '♖', '♕', '♔', '♟', '♞', '♝', '♜', '♛', '♚']
+
+# (gui row, gui column, square) for every board button, keyed by "player is white"
+SQUARE_ORDER = {
+    True: [(r, c, (7 - r) * 8 + c) for r in range(8) for c in range(8)],
+    False: [(7 - r, c, (7 - r) * 8 + c) for r in range(8) for c in range(8)],
+}
+
+# The same mapping as lookups: GUI_TO_SQUARE[white][row][col] and SQUARE_TO_GUI[white][square]
+GUI_TO_SQUARE = {white: [[None] * 8 for _ in range(8)] for white in (True, False)}
+SQUARE_TO_GUI = {white: [None] * 64 for white in (True, False)}
+for _white, _order in SQUARE_ORDER.items():
+    for _r, _c, _square in _order:
+        GUI_TO_SQUARE[_white][_r][_c] = _square
+        SQUARE_TO_GUI[_white][_square] = (_r, _c)
+
 def setup_logging():
-    """Configure logging to file and console."""
+    """Configure logging to file and console, written from a background listener thread."""
+    # Callers only enqueue records; the file and console writes happen on the listener thread
+    log_queue = queue.SimpleQueue()
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s [%(levelname)s] %(message)s',
-        handlers=[
-            logging.FileHandler('chess_vs_ai.log'),
-            logging.StreamHandler()
-        ]
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+    listener = logging.handlers.QueueListener(
+        log_queue,
+        logging.FileHandler('chess_vs_ai.log'),
+        logging.StreamHandler()
     )
+    listener.start()
+    atexit.register(listener.stop)
+
+# Material values in centipawns, indexed by piece type, for the built-in search
+PIECE_VALUES = [0, 100, 320, 330, 500, 900, 0]
+MATE_SCORE = 100000
+SEARCH_INF = MATE_SCORE + 1000
+
+# Bound types stored with search transposition table entries
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+
+class SearchTimeout(Exception):
+    """Raised inside the alpha-beta search when its time budget runs out."""
+    pass
+
+def to_sqlite_int(key):
+    """Map an unsigned 64-bit Zobrist hash onto SQLite's signed INTEGER range."""
+    return key - (1 << 64) if key >= (1 << 63) else key
 
 class ChessError(Exception):
     """Custom exception for chess-specific errors."""
     pass
 
+class LRUCache(OrderedDict):
+    """Ordered dict that evicts its least recently used entry past maxsize.
+
+    get() and put() are safe to call from several threads at once.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value and mark it as recently used."""
+        with self.lock:
+            if key not in self:
+                return default
+            self.move_to_end(key)
+            return self[key]
+
+    def put(self, key, value):
+        """Store a value, evicting the oldest entry if the cache is full."""
+        with self.lock:
+            self[key] = value
+            self.move_to_end(key)
+            if len(self) > self.maxsize:
+                self.popitem(last=False)
+
 class ChessVsAI:
     def __init__(self):
         """Initialize the Chess vs AI application."""
         setup_logging()
         logging.info("Initializing ChessVsAI")
-        self.PIECES = {
-            'K': '♔', 'Q': '♕', 'R': '♖', 'B': '♗', 'N': '♘', 'P': '♙',
-            'k': '♚', 'q': '♛', 'r': '♜', 'b': '♝', 'n': '♞', 'p': '♟'
-        }
         self.player_side = 'white'
+        self.player_color = chess.WHITE  # player_side as a python-chess color for turn checks
         self.review_mode = False
         self.current_review_move = 0
         self.ai_thinking = False
         self.board_lock = threading.Lock()
+        self.ai_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ai')  # AI turn + Stockfish standby
+        self.eval_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='eval')
+        self.engine_lock = threading.Lock()  # SimpleEngine is not safe to drive from two threads at once
+        self.eval_futures = []  # Queued evaluations, cancelled when the game is replaced
+        self.closing = False  # Lets the AI worker bail out early when the window closes
+        self.ui_queue = queue.SimpleQueue()  # Callbacks from worker threads, run on the Tk thread
         self.pgn_comments = {}
         self.ai_difficulty = 'medium'  # Default difficulty
         
         # Load environment variables
+        from dotenv import load_dotenv
         load_dotenv()
         self.stockfish_path = os.getenv("STOCKFISH_PATH", r"C:\Users\HP\Desktop\Grok Api Chess Bot\stockfish.exe")
         self.ollama_model = os.getenv("OLLAMA_MODEL", "phi3")
         self.ollama_timeout = float(os.getenv("OLLAMA_TIMEOUT", str(CONFIG["ollama"]["timeout"])))
+        self.stockfish_hash = int(os.getenv("STOCKFISH_HASH", "256"))
+        self.stockfish_threads = int(os.getenv("STOCKFISH_THREADS", str(min(4, os.cpu_count() or 2))))
+        tt_max = int(os.getenv("TRANSPOSITION_TABLE_MAX", str(CONFIG["transposition_table_size"])))
+        self.transposition_table = LRUCache(tt_max)  # Zobrist hash -> (uci move, explanation)
+        self.eval_cache = LRUCache(tt_max)  # (Zobrist hash, difficulty) -> (evaluation, best move)
+        # One client for the whole session so the HTTP connection to the server is reused;
+        # created on first use so startup doesn't pay for importing the ollama package
+        self.ollama_client = None
+        self.ollama_requests = queue.SimpleQueue()  # (prompt, chunk queue, done event) for the reader thread
+        self.ollama_reader = None  # One long-lived daemon thread that performs the HTTP reads
         
         # Validate environment variables
         if not os.path.exists(self.stockfish_path):
@@ -78,8 +190,21 @@ class ChessVsAI:
         self.engine = None
         self.init_stockfish()
         
+        # Open the opening book once; polyglot readers are memory-mapped
+        self.opening_book = None
+        self.init_opening_book()
+        
+        # Ollama answers persist across sessions so known positions skip the LLM entirely
+        self.tt_db = None
+        self.tt_db_lock = threading.Lock()  # Keeps on_closing from closing the connection mid-query
+        self.init_transposition_db()
+        
         # Initialize GUI components
         self.squares = [[None for _ in range(8)] for _ in range(8)]
+        self.square_state = [[None for _ in range(8)] for _ in range(8)]  # Last (text, bg) drawn per button
+        self.piece_font = None  # Shared by all 64 buttons so a resize is one font change
+        self.eval_bar_state = {'coords': None, 'fill': None, 'text': None}  # What the eval bar shows now
+        self._resize_after = None
         self.setup_gui()
         self.reset_game()
 
@@ -89,9 +214,11 @@ class ChessVsAI:
             if not self.stockfish_path:
                 raise ChessError("Stockfish path not set or invalid")
             self.engine = chess.engine.SimpleEngine.popen_uci(self.stockfish_path)
+            # Evaluations are bounded searches per position rather than one long-lived analysis,
+            # and the engine does not ponder: the same engine serves the AI's Stockfish moves
             self.engine.configure({
-                "Threads": min(4, os.cpu_count() or 2),
-                "Hash": 256,
+                "Threads": self.stockfish_threads,
+                "Hash": self.stockfish_hash,
                 "UCI_LimitStrength": False
             })
             logging.info("Stockfish loaded successfully")
@@ -100,15 +227,81 @@ class ChessVsAI:
             self.engine = None
             messagebox.showerror("Stockfish Error", f"Failed to initialize Stockfish: {str(e)}. Falling back to Ollama/random moves.")
 
+    def init_opening_book(self):
+        """Open the Polyglot opening book if one is available."""
+        try:
+            if os.path.exists(CONFIG["paths"]["openings"]):
+                self.opening_book = chess.polyglot.open_reader(CONFIG["paths"]["openings"])
+                logging.info("Opening book loaded successfully")
+            else:
+                logging.info(f"Opening book '{CONFIG['paths']['openings']}' not found")
+        except Exception as e:
+            logging.error(f"Failed to load opening book: {e}", exc_info=True)
+            self.opening_book = None
+
+    def init_transposition_db(self):
+        """Open the on-disk store behind the Ollama transposition table."""
+        try:
+            # AI worker threads read and write after startup; tt_db_lock serialises them with close
+            self.tt_db = sqlite3.connect(CONFIG["paths"]["transposition_db"], check_same_thread=False)
+            self.tt_db.execute(
+                "CREATE TABLE IF NOT EXISTS tt ("
+                "zobrist INTEGER NOT NULL, model TEXT NOT NULL, move TEXT NOT NULL, explanation TEXT, "
+                "PRIMARY KEY (zobrist, model))"
+            )
+            self.tt_db.commit()
+        except Exception as e:
+            logging.error(f"Failed to open transposition database: {e}", exc_info=True)
+            self.tt_db = None
+
+    def tt_lookup(self, key):
+        """Return the stored (uci move, explanation) for a Zobrist key, or None."""
+        result = self.transposition_table.get(key)
+        if result is not None or self.closing:
+            return result
+        try:
+            with self.tt_db_lock:
+                if not self.tt_db:
+                    return None
+                row = self.tt_db.execute(
+                    "SELECT move, explanation FROM tt WHERE zobrist = ? AND model = ?",
+                    (to_sqlite_int(key), self.ollama_model)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Transposition database read error: {e}", exc_info=True)
+            return None
+        if row:
+            result = (row[0], row[1])
+            self.transposition_table.put(key, result)
+        return result
+
+    def tt_store(self, key, result):
+        """Remember an Ollama answer in memory and on disk."""
+        self.transposition_table.put(key, result)
+        try:
+            with self.tt_db_lock:
+                if not self.tt_db:
+                    return  # No database, or already closed by on_closing
+                with self.tt_db:
+                    self.tt_db.execute(
+                        "INSERT OR REPLACE INTO tt (zobrist, model, move, explanation) VALUES (?, ?, ?, ?)",
+                        (to_sqlite_int(key), self.ollama_model, result[0], result[1])
+                    )
+        except sqlite3.Error as e:
+            logging.error(f"Transposition database write error: {e}", exc_info=True)
+
     def reset_game(self):
         """Reset the game state to initial position."""
         try:
             with self.board_lock:
                 self.chess_board = chess.Board()
                 self.move_history = []
-                self.board_history = [copy.deepcopy(self.chess_board)]
-                self.evaluations = [0.0]
-                self.best_moves = [None]
+                self._review_board = None
+                self._review_ply = 0
+                self._legal_cache = None
+                for future in self.eval_futures:
+                    future.cancel()  # Jobs for the old game would only hold up the engine
+                self.eval_futures = []
                 self.selected_square = None
                 self.last_move = None
                 self.current_turn = 'white'
@@ -352,12 +545,7 @@ class ChessVsAI:
             
             move_num = (self.current_review_move + 1) // 2
             color = 'White' if self.current_review_move % 2 == 1 else 'Black'
-            move = self.move_history[self.current_review_move - 1]['move']
-            prev_board = self.board_history[self.current_review_move - 1]
-            try:
-                move_text = prev_board.san(move)
-            except:
-                move_text = move.uci()
+            move_text = self.move_history[self.current_review_move - 1]['san']
             
             tk.Label(dialog, text=f"Comment for Move {move_num} ({color}): {move_text}", 
                      font=('Arial', 12, 'bold'), fg='#ecf0f1', bg=CONFIG["gui"]["bg"], wraplength=300).pack(pady=10)
@@ -396,6 +584,39 @@ class ChessVsAI:
             logging.error(f"Add comment error: {e}", exc_info=True)
             messagebox.showerror("Error", f"Failed to add comment: {str(e)}")
 
+    def show_debug(self, text, clear=False):
+        """Write to the Ollama debug panel; safe to call from the AI worker thread."""
+        def write():
+            try:
+                if clear:
+                    self.debug_text.delete(1.0, tk.END)
+                self.debug_text.insert(tk.END, text)
+            except Exception as e:
+                logging.error(f"Debug panel error: {e}", exc_info=True)
+        
+        if threading.current_thread() is threading.main_thread():
+            write()
+        else:
+            self.post_to_ui(write)
+
+    def post_to_ui(self, callback, *args):
+        """Queue a callback to run on the Tk thread; safe to call from any thread."""
+        self.ui_queue.put((callback, args))
+
+    def drain_ui_queue(self):
+        """Run every callback queued by worker threads, then reschedule."""
+        while True:
+            try:
+                callback, args = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.error(f"UI callback error: {e}", exc_info=True)
+        if not self.closing:
+            self.root.after(CONFIG["gui"]["ui_poll_ms"], self.drain_ui_queue)
+
     def prompt_for_comment(self):
         """Prompt for a comment after a move is made, if in review mode."""
         try:
@@ -438,6 +659,9 @@ class ChessVsAI:
             scrollbar = tk.Scrollbar(text_frame, orient='vertical', command=self.analysis_text.yview)
             self.analysis_text.configure(yscrollcommand=scrollbar.set)
             
+            self.analysis_text.tag_configure("ai_comment", foreground="#00B7EB", font=('Arial', CONFIG["font_sizes"]["analysis"], 'italic'))
+            self.analysis_text.tag_configure("user_comment", foreground="#00FF00", font=('Arial', CONFIG["font_sizes"]["analysis"], 'bold'))
+            
             self.analysis_text.pack(side='left', fill='both', expand=True)
             scrollbar.pack(side='right', fill='y')
         except Exception as e:
@@ -462,6 +686,8 @@ class ChessVsAI:
                 padx=5,
                 pady=5
             )
+            self.move_list_text.tag_configure("highlight", background="#FFD700")
+            self.move_list_text.tag_configure("commented", foreground="#00FF00")
             scrollbar = tk.Scrollbar(move_list_frame, orient='vertical', command=self.move_list_text.yview)
             self.move_list_text.configure(yscrollcommand=scrollbar.set)
             self.move_list_text.pack(side='left', fill='both', expand=True)
@@ -493,10 +719,7 @@ class ChessVsAI:
             
             if 0 <= move_index <= len(self.move_history):
                 self.current_review_move = move_index
-                self.update_board()
-                self.update_status()
-                self.update_eval_bar()
-                self.update_move_list()
+                self._refresh_all()
                 self.setup_control_buttons()
                 self.root.after(500, self.prompt_for_comment)
                 logging.info(f"Navigated to move {self.current_review_move} via move list click")
@@ -506,21 +729,24 @@ class ChessVsAI:
     def create_board(self):
         """Create the chess board GUI."""
         try:
+            if self.piece_font is None:
+                self.piece_font = tkfont.Font(family='Arial', size=CONFIG["font_sizes"]["piece"])
+            
             for r in range(8):
                 for c in range(8):
-                    if self.squares[r][c]:
-                        self.squares[r][c].destroy()
-                    
-                    btn = tk.Button(
-                        self.board_frame,
-                        font=('Arial', CONFIG["font_sizes"]["piece"]),
-                        command=lambda x=r, y=c: self.on_click(x, y),
-                        relief='flat',
-                        bd=1,
-                        cursor='hand2'
-                    )
-                    btn.grid(row=r, column=c, padx=1, pady=1, sticky='nsew')
-                    self.squares[r][c] = btn
+                    # Buttons are built once; a rebuild only forces the next redraw to repaint them
+                    if self.squares[r][c] is None:
+                        btn = tk.Button(
+                            self.board_frame,
+                            font=self.piece_font,
+                            command=lambda x=r, y=c: self.on_click(x, y),
+                            relief='flat',
+                            bd=1,
+                            cursor='hand2'
+                        )
+                        btn.grid(row=r, column=c, padx=1, pady=1, sticky='nsew')
+                        self.squares[r][c] = btn
+                    self.square_state[r][c] = None
             
             for i in range(8):
                 self.board_frame.grid_rowconfigure(i, weight=1, uniform='chess_rows')
@@ -530,31 +756,63 @@ class ChessVsAI:
             messagebox.showerror("Error", "Failed to initialize chess board")
 
     def on_window_resize(self, event):
-        """Handle window resize events."""
+        """Handle window resize events, applying the new size once the drag settles."""
         try:
             if event.widget == self.root:
-                board_height = self.board_container.winfo_height()
-                board_width = self.board_container.winfo_width()
-                if board_height > 50 and board_width > 50:
-                    new_size = max(12, min(24, int(min(board_height, board_width) / 30)))
-                    for r in range(8):
-                        for c in range(8):
-                            if self.squares[r][c]:
-                                self.squares[r][c].config(font=('Arial', new_size))
+                if self._resize_after:
+                    self.root.after_cancel(self._resize_after)
+                self._resize_after = self.root.after(50, self.apply_resize)
+        except Exception as e:
+            logging.error(f"Window resize error: {e}", exc_info=True)
+
+    def apply_resize(self):
+        """Scale the piece font to the current board size."""
+        try:
+            self._resize_after = None
+            board_height = self.board_container.winfo_height()
+            board_width = self.board_container.winfo_width()
+            if board_height > 50 and board_width > 50:
+                new_size = max(12, min(24, int(min(board_height, board_width) / 30)))
+                if new_size != self.piece_font.cget('size'):
+                    self.piece_font.configure(size=new_size)
         except Exception as e:
             logging.error(f"Window resize error: {e}", exc_info=True)
 
     def on_closing(self):
         """Clean up resources when closing."""
         try:
+            self.closing = True
+            if self.ollama_client is not None and hasattr(self.ollama_client, 'close'):
+                self.ollama_client.close()  # Refuses new requests and drops pooled connections
             if self.engine:
-                self.engine.quit()
+                # Quit from the eval thread so the window doesn't wait for a running analysis or search;
+                # both stop at their next info line now that closing is set
+                self.eval_executor.submit(self._quit_engine)
+            self.ai_executor.shutdown(wait=False)
+            self.eval_executor.shutdown(wait=False)
+            if self.opening_book:
+                self.opening_book.close()
+            with self.tt_db_lock:  # Lets a write already in progress commit first
+                if self.tt_db:
+                    self.tt_db.close()
+                    self.tt_db = None
             self.root.destroy()
         except Exception as e:
             logging.error(f"On closing error: {e}", exc_info=True)
 
-    def get_promotion_piece(self, is_white):
-        """Prompt user to select a pawn promotion piece."""
+    def _quit_engine(self):
+        """Quit Stockfish once nothing else is using it."""
+        try:
+            with self.engine_lock:
+                self.engine.quit()
+        except Exception as e:
+            logging.error(f"Stockfish quit error: {e}", exc_info=True)
+
+    def get_promotion_piece(self, is_white, callback):
+        """Ask the user for a pawn promotion piece and pass its symbol (or None) to `callback`.
+
+        The dialog is modal to the board but does not block; the move continues from the callback.
+        """
         try:
             dialog = tk.Toplevel(self.root)
             dialog.title("Pawn Promotion")
@@ -574,36 +832,36 @@ class ChessVsAI:
                 tk.Radiobutton(dialog, text=piece, variable=piece_var, value=piece, font=('Arial', 10),
                               fg='#ecf0f1', bg=CONFIG["gui"]["bg"], selectcolor='#34495e').pack(anchor='w', padx=20)
             
+            piece_map = {'Queen': 'q', 'Rook': 'r', 'Knight': 'n', 'Bishop': 'b'}
+            
             def confirm():
-                dialog.result = piece_var.get()
                 dialog.destroy()
+                callback(piece_map.get(piece_var.get()))
             
             def cancel():
-                dialog.result = None
                 dialog.destroy()
+                callback(None)
             
             tk.Button(dialog, text="Confirm", command=confirm, font=('Arial', 10), bg='#3498db', fg='white', relief='flat', padx=20).pack(pady=5)
             tk.Button(dialog, text="Cancel", command=cancel, font=('Arial', 10), bg='#e74c3c', fg='white', relief='flat', padx=20).pack(pady=5)
-            
-            self.root.wait_window(dialog)
-            piece_map = {'Queen': 'q', 'Rook': 'r', 'Knight': 'n', 'Bishop': 'b'}
-            return piece_map.get(getattr(dialog, 'result', None), None)
+            dialog.protocol("WM_DELETE_WINDOW", cancel)
         except Exception as e:
             logging.error(f"Promotion dialog error: {e}", exc_info=True)
-            return None
+            callback(None)
 
     def make_move(self, move):
         """Make a move on the board."""
         try:
             with self.board_lock:
-                if self.game_over or self.review_mode or move not in self.chess_board.legal_moves:
+                if self.game_over or self.review_mode or move not in self._legal():
                     logging.warning(f"Invalid move attempt: {move.uci() if move else None}")
                     return False
                 
-                move_data = {'move': move, 'board': copy.deepcopy(self.chess_board)}
+                move_data = {'move': move, 'san': self.chess_board.san(move), 'eval': None, 'best': None}
                 self.chess_board.push(move)
+                self._legal_cache = None
                 self.move_history.append(move_data)
-                self.board_history.append(copy.deepcopy(self.chess_board))
+                self._review_board = None
                 
                 self.get_position_evaluation()
                 
@@ -615,34 +873,91 @@ class ChessVsAI:
             return False
 
     def get_position_evaluation(self):
-        """Get position evaluation from Stockfish engine."""
+        """Fill in the evaluation of the position after the last move without blocking the GUI.
+
+        Cached positions are filled in right away; otherwise the analysis is queued
+        and the worker writes its result into the move entry when it finishes.
+        """
         try:
-            if not self.engine:
-                self.evaluations.append(0.0)
-                self.best_moves.append(None)
+            entry = self.move_history[-1]
+            key = (chess.polyglot.zobrist_hash(self.chess_board), self.ai_difficulty)
+            entry['key'] = key  # Lets a late result check it still belongs to this slot
+            cached = self.eval_cache.get(key)
+            if cached is not None:
+                entry['eval'], entry['best'] = cached
                 return
             
-            depth = CONFIG["stockfish"][self.ai_difficulty]["depth"]
-            time_limit = CONFIG["stockfish"][self.ai_difficulty]["time"]
+            if not self.engine:
+                entry['eval'] = 0.0
+                return
             
-            eval_info = self.engine.analyse(
-                self.chess_board, 
-                chess.engine.Limit(depth=depth, time=time_limit)
+            ply = len(self.move_history) - 1
+            self.eval_futures = [future for future in self.eval_futures if not future.done()]
+            self.eval_futures.append(
+                self.eval_executor.submit(self._eval_worker, self.chess_board.copy(stack=False), key, ply)
             )
-            
-            if eval_info['score'].is_mate():
-                eval_score = f"M{eval_info['score'].mate()}"
-            else:
-                centipawns = eval_info['score'].relative.cp
-                eval_score = centipawns / 100.0 if centipawns is not None else 0.0
-            
-            self.evaluations.append(eval_score)
-            pv = eval_info.get('pv', [])
-            self.best_moves.append(pv[0] if pv else None)
         except Exception as e:
             logging.error(f"Evaluation error: {e}", exc_info=True)
-            self.evaluations.append(0.0)
-            self.best_moves.append(None)
+            self.move_history[-1]['eval'] = 0.0
+
+    def _eval_worker(self, board, key, ply):
+        """Analyse `board` on the evaluation thread and hand the result to the Tk thread."""
+        if self.closing or not self._eval_slot_matches(ply, key):
+            return  # Undone or replaced while queued; don't spend engine time on it
+        try:
+            difficulty = key[1]  # The level the job was queued at, which is also what the cache is keyed on
+            depth = CONFIG["stockfish"][difficulty]["depth"]
+            time_limit = CONFIG["stockfish"][difficulty]["time"]
+            
+            with self.engine_lock:
+                if self.closing or not self._eval_slot_matches(ply, key):
+                    return  # The engine may have been quit, or the move undone, while this job waited
+                # Run as an analysis so closing the window can stop it instead of waiting out the time limit
+                with self.engine.analysis(board, chess.engine.Limit(depth=depth, time=time_limit)) as analysis:
+                    for _ in analysis:
+                        if self.closing:
+                            return
+                    eval_info = analysis.info
+                
+                if eval_info['score'].is_mate():
+                    eval_score = f"M{eval_info['score'].mate()}"
+                else:
+                    centipawns = eval_info['score'].relative.cp
+                    eval_score = centipawns / 100.0 if centipawns is not None else 0.0
+                
+                pv = eval_info.get('pv', [])
+                best_move = pv[0] if pv else None
+                # Cached before the lock is released so get_stockfish_move never misses a finished analysis
+                self.eval_cache.put(key, (eval_score, best_move))
+        except Exception as e:
+            if self.closing:
+                return
+            logging.error(f"Evaluation error: {e}", exc_info=True)
+            eval_score, best_move = 0.0, None
+        
+        if not self.closing:
+            self.post_to_ui(self._apply_eval, ply, key, eval_score, best_move)
+
+    def _eval_slot_matches(self, ply, key):
+        """Return True while move slot `ply` still holds the position `key` was queued for."""
+        try:
+            return self.move_history[ply].get('key') == key
+        except IndexError:
+            return False
+
+    def _apply_eval(self, ply, key, eval_score, best_move):
+        """Store a finished evaluation in its slot unless that slot now holds a different position."""
+        try:
+            if not self._eval_slot_matches(ply, key):
+                return
+            self.move_history[ply]['eval'] = eval_score
+            self.move_history[ply]['best'] = best_move
+            self.update_eval_bar()
+            # The review panel reads the evaluations of the two positions before the reviewed move
+            if self.review_mode and ply + 1 in (self.current_review_move - 1, self.current_review_move - 2):
+                self.update_analysis_text()
+        except Exception as e:
+            logging.error(f"Apply evaluation error: {e}", exc_info=True)
 
     def undo_move(self):
         """Undo the last move(s)."""
@@ -651,27 +966,20 @@ class ChessVsAI:
                 return False
             
             with self.board_lock:
-                if not (len(self.move_history) == len(self.board_history) - 1 == len(self.evaluations) == len(self.best_moves)):
-                    raise ChessError("Game state lists out of sync")
-                
                 moves_to_undo = 2 if len(self.move_history) >= 2 else 1
                 
                 for _ in range(moves_to_undo):
                     if self.move_history:
                         self.move_history.pop()
-                        self.board_history.pop()
-                        self.evaluations.pop()
-                        self.best_moves.pop()
                         self.chess_board.pop()
+                self._legal_cache = None
+                self._review_board = None
                 
                 self.current_turn = 'white' if len(self.move_history) % 2 == 0 else 'black'
                 self.game_over = False
                 self.last_move = None
             
-            self.update_board()
-            self.update_status()
-            self.update_eval_bar()
-            self.update_move_list()
+            self._refresh_all()
             return True
         except Exception as e:
             logging.error(f"Undo move error: {e}", exc_info=True)
@@ -732,13 +1040,10 @@ class ChessVsAI:
                 game.headers["Result"] = "*"
             
             node = game
-            temp_board = chess.Board()
             for i, move_data in enumerate(self.move_history):
-                move = move_data['move']
-                node = node.add_variation(move)
+                node = node.add_variation(move_data['move'])
                 if i in self.pgn_comments:
                     node.comment = self.pgn_comments[i]
-                temp_board.push(move)
             
             return game
         except Exception as e:
@@ -795,9 +1100,6 @@ class ChessVsAI:
                 self.reset_game()
                 self.chess_board = game.board()
                 self.move_history = []
-                self.board_history = [copy.deepcopy(self.chess_board)]
-                self.evaluations = [0.0]
-                self.best_moves = [None]
                 self.pgn_comments = {}
 
                 node = game
@@ -807,16 +1109,18 @@ class ChessVsAI:
                     comment = node.variation(0).comment
                     if comment:
                         self.pgn_comments[move_number] = comment
-                    move_data = {'move': move, 'board': copy.deepcopy(self.chess_board)}
+                    move_data = {'move': move, 'san': self.chess_board.san(move), 'eval': None, 'best': None}
                     self.chess_board.push(move)
                     self.move_history.append(move_data)
-                    self.board_history.append(copy.deepcopy(self.chess_board))
                     self.get_position_evaluation()
                     node = node.variation(0)
                     move_number += 1
 
+                self._legal_cache = None
+                self._review_board = None
                 self.game_over = True
                 self.player_side = 'white' if game.headers.get("White", "").lower() == "player" else 'black'
+                self.player_color = self.player_side == 'white'
                 result = game.headers.get("Result", "*")
                 status = {
                     "1-0": "White wins!",
@@ -838,24 +1142,17 @@ class ChessVsAI:
             if self.game_over or self.review_mode or self.ai_thinking:
                 return
             
-            if self.player_side == 'black':
-                board_row = 7 - gui_row
-                board_col = gui_col
-            else:
-                board_row = gui_row
-                board_col = gui_col
+            square = GUI_TO_SQUARE[self.player_side == 'white'][gui_row][gui_col]
+            logging.debug("Clicked square: %s", chess.SQUARE_NAMES[square])
             
-            square = chess.square(board_col, 7 - board_row)
-            logging.info(f"Clicked square: {chess.square_name(square)}")
-            
-            if (self.current_turn == 'white') != (self.player_side == 'white'):
+            if self.chess_board.turn != self.player_color:
                 return
             
             if self.selected_square is None:
                 piece = self.chess_board.piece_at(square)
                 if piece and piece.color == (self.current_turn == 'white'):
                     self.selected_square = square
-                    logging.info(f"Selected piece: {piece.symbol()} at {chess.square_name(square)}")
+                    logging.debug("Selected piece: %s at %s", piece, chess.SQUARE_NAMES[square])
                     self.update_board()
             else:
                 if square == self.selected_square:
@@ -864,7 +1161,7 @@ class ChessVsAI:
                 elif (self.chess_board.piece_at(square) and 
                       self.chess_board.piece_at(square).color == (self.current_turn == 'white')):
                     self.selected_square = square
-                    logging.info(f"Reselected piece: {self.chess_board.piece_at(square).symbol()} at {chess.square_name(square)}")
+                    logging.debug("Reselected piece: %s at %s", self.chess_board.piece_at(square), chess.SQUARE_NAMES[square])
                     self.update_board()
                 else:
                     self.attempt_move(square)
@@ -873,80 +1170,99 @@ class ChessVsAI:
             messagebox.showerror("Error", "Failed to process click")
 
     def attempt_move(self, target_square):
-        """Attempt to make a move to the target square."""
+        """Attempt to make a move to the target square, asking for a promotion piece if needed."""
         try:
-            move = chess.Move(self.selected_square, target_square)
+            from_square = self.selected_square
             
-            if (self.chess_board.piece_at(self.selected_square).piece_type == chess.PAWN and
+            if (self.chess_board.piece_at(from_square).piece_type == chess.PAWN and
                 chess.square_rank(target_square) in [0, 7]):
-                promotion = self.get_promotion_piece(self.current_turn == 'white')
-                if promotion is None:
-                    self.selected_square = None
-                    self.update_board()
+                if CONFIG["auto_queen"]:
+                    self.complete_move(chess.Move(from_square, target_square, promotion=chess.QUEEN))
                     return
                 
-                if promotion not in 'qrnb':
-                    raise ChessError("Invalid promotion piece selected")
+                def on_promotion(promotion):
+                    if promotion is None:
+                        self.selected_square = None
+                        self.update_board()
+                        return
+                    self.complete_move(chess.Move(
+                        from_square,
+                        target_square,
+                        promotion=chess.Piece.from_symbol(promotion).piece_type
+                    ))
                 
-                move = chess.Move(
-                    self.selected_square, 
-                    target_square, 
-                    promotion=chess.Piece.from_symbol(promotion).piece_type
-                )
+                self.get_promotion_piece(self.current_turn == 'white', on_promotion)
+                return
             
-            if move in self.chess_board.legal_moves:
-                if self.make_move(move):
-                    self.selected_square = None
-                    self.update_board()
-                    self.update_status()
-                    self.update_eval_bar()
-                    self.update_move_list()
-                    self.check_game_end()
-                    
-                    if not self.game_over and self.current_turn != self.player_side:
-                        self.root.after(500, self.ai_move)
-            else:
-                messagebox.showinfo("Invalid Move", "That move is not legal!")
-                self.squares[7 - chess.square_rank(target_square) if self.player_side == 'white' else chess.square_rank(target_square)][
-                    chess.square_file(target_square)].config(bg='#FF6B6B')
-                self.root.after(500, self.update_board)
+            self.complete_move(chess.Move(from_square, target_square))
+        except Exception as e:
+            logging.error(f"Attempt move error: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to process move: {str(e)}")
+
+    def complete_move(self, move):
+        """Play the player's move if it is legal and hand the turn to the AI."""
+        try:
+            if move not in self._legal():
+                self.selected_square = None
+                self.update_board()
+                self.flash_illegal_move(move.to_square)
+                return
+            
+            if self.make_move(move):
+                self.selected_square = None
+                self._refresh_all()
+                self.check_game_end()
+                
+                if not self.game_over and self.chess_board.turn != self.player_color:
+                    self.root.after_idle(self.ai_move)
             
             self.selected_square = None
             self.update_board()
         except Exception as e:
-            logging.error(f"Attempt move error: {e}", exc_info=True)
+            logging.error(f"Complete move error: {e}", exc_info=True)
             messagebox.showerror("Error", f"Failed to process move: {str(e)}")
 
+    def flash_illegal_move(self, target_square):
+        """Briefly mark an illegal target square and say so in the status line, without a modal dialog."""
+        gui_r, gui_c = SQUARE_TO_GUI[self.player_side == 'white'][target_square]
+        self.squares[gui_r][gui_c].config(bg=CONFIG["board_colors"]["check"])
+        self.square_state[gui_r][gui_c] = None  # Force the next redraw to restore this square
+        self.root.after(500, self.update_board)
+        
+        self.status_label.config(text="That move is not legal!", fg='#e74c3c')
+        
+        def restore():
+            self.status_label.config(fg='#ecf0f1')
+            self.update_status()
+        
+        self.root.after(1500, restore)
+
     def check_game_end(self):
         """Check if the game has ended and save PGN."""
         try:
             with self.board_lock:
-                if self.chess_board.is_checkmate():
-                    winner = 'Black' if self.current_turn == 'white' else 'White'
-                    self.status_label.config(text=f"Checkmate! {winner} wins!")
-                    self.game_over = True
-                    self.auto_save_pgn()
-                    self.root.after(1000, self.enter_review_mode)
-                elif self.chess_board.is_stalemate():
-                    self.status_label.config(text="Draw by stalemate!")
-                    self.game_over = True
-                    self.auto_save_pgn()
-                    self.root.after(1000, self.enter_review_mode)
-                elif self.chess_board.is_insufficient_material():
-                    self.status_label.config(text="Draw by insufficient material!")
-                    self.game_over = True
-                    self.auto_save_pgn()
-                    self.root.after(1000, self.enter_review_mode)
-                elif self.chess_board.is_fifty_moves():
-                    self.status_label.config(text="Draw by fifty-move rule!")
-                    self.game_over = True
-                    self.auto_save_pgn()
-                    self.root.after(1000, self.enter_review_mode)
-                elif self.chess_board.is_repetition():
-                    self.status_label.config(text="Draw by repetition!")
-                    self.game_over = True
-                    self.auto_save_pgn()
-                    self.root.after(1000, self.enter_review_mode)
+                # Mate and stalemate come straight from the cached legal move list
+                board = self.chess_board
+                if not self._legal():
+                    if board.is_check():
+                        winner = 'Black' if self.current_turn == 'white' else 'White'
+                        status = f"Checkmate! {winner} wins!"
+                    else:
+                        status = "Draw by stalemate!"
+                elif board.is_insufficient_material():
+                    status = "Draw by insufficient material!"
+                elif board.halfmove_clock >= 100:  # is_fifty_moves() minus its legal-move scan
+                    status = "Draw by fifty-move rule!"
+                elif board.halfmove_clock >= 8 and board.is_repetition():
+                    # A threefold repetition needs at least 8 reversible half-moves
+                    status = "Draw by repetition!"
+                else:
+                    return
+                
+                self.status_label.config(text=status)
+                self.game_over = True
+                self.auto_save_pgn()
+                self.root.after(1000, self.enter_review_mode)
         except Exception as e:
             logging.error(f"Check game end error: {e}", exc_info=True)
             messagebox.showerror("Error", "Failed to check game end")
@@ -956,11 +1272,9 @@ class ChessVsAI:
         try:
             self.review_mode = True
             self.current_review_move = len(self.move_history)
+            self._review_board = None  # The move list may have changed since the last review
             self.setup_control_buttons()
-            self.update_board()
-            self.update_status()
-            self.update_eval_bar()
-            self.update_move_list()
+            self._refresh_all()
         except Exception as e:
             logging.error(f"Enter review mode error: {e}", exc_info=True)
             messagebox.showerror("Error", "Failed to enter review mode")
@@ -970,10 +1284,7 @@ class ChessVsAI:
         try:
             self.review_mode = False
             self.setup_control_buttons()
-            self.update_board()
-            self.update_status()
-            self.update_eval_bar()
-            self.update_move_list()
+            self._refresh_all()
         except Exception as e:
             logging.error(f"Exit review mode error: {e}", exc_info=True)
             messagebox.showerror("Error", "Failed to exit review mode")
@@ -983,10 +1294,7 @@ class ChessVsAI:
         try:
             if self.current_review_move > 0:
                 self.current_review_move -= 1
-                self.update_board()
-                self.update_status()
-                self.update_eval_bar()
-                self.update_move_list()
+                self._refresh_all()
                 self.setup_control_buttons()
                 self.root.after(500, self.prompt_for_comment)
         except Exception as e:
@@ -998,16 +1306,52 @@ class ChessVsAI:
         try:
             if self.current_review_move < len(self.move_history):
                 self.current_review_move += 1
-                self.update_board()
-                self.update_status()
-                self.update_eval_bar()
-                self.update_move_list()
+                self._refresh_all()
                 self.setup_control_buttons()
                 self.root.after(500, self.prompt_for_comment)
         except Exception as e:
             logging.error(f"Next move error: {e}", exc_info=True)
             messagebox.showerror("Error", "Failed to go to next move")
 
+    def _refresh_all(self):
+        """Redraw the board, status line, evaluation bar and move list together."""
+        self.update_board()
+        self.update_status()
+        self.update_eval_bar()
+        self.update_move_list()
+
+    def _legal(self):
+        """Return the legal moves of the current position, generated once per position."""
+        if self._legal_cache is None:
+            self._legal_cache = list(self.chess_board.legal_moves)
+        return self._legal_cache
+
+    def _position_analysis(self, ply):
+        """Return (evaluation, best move) for the position after `ply` half-moves."""
+        if ply == 0:
+            return 0.0, None
+        entry = self.move_history[ply - 1]
+        return entry['eval'], entry['best']
+
+    def _board_at(self, ply):
+        """Return the position after `ply` half-moves, replaying from the start of the game.
+
+        The result is cached, so stepping one move back or forward in review is a
+        single pop/push instead of a full replay. Callers must not keep the board.
+        """
+        board = self._review_board
+        if board is None or abs(ply - self._review_ply) > 1:
+            board = self.chess_board.root()
+            for entry in self.move_history[:ply]:
+                board.push(entry['move'])
+        elif ply == self._review_ply + 1:
+            board.push(self.move_history[ply - 1]['move'])
+        elif ply == self._review_ply - 1:
+            board.pop()
+        self._review_board = board
+        self._review_ply = ply
+        return board
+
     def update_board(self):
         """Update the visual representation of the board with thread safety."""
         try:
@@ -1015,49 +1359,54 @@ class ChessVsAI:
                 if not self.squares or not all(self.squares[r][c] for r in range(8) for c in range(8)):
                     raise ChessError("Invalid squares array")
                 
-                board_state = self.board_history[self.current_review_move] if self.review_mode else self.chess_board
+                board_state = self._board_at(self.current_review_move) if self.review_mode else self.chess_board
                 
-                for r in range(8):
-                    for c in range(8):
-                        square = chess.square(c, 7-r)
-                        gui_r = 7 - chess.square_rank(square) if self.player_side == 'white' else chess.square_rank(square)
-                        gui_c = chess.square_file(square)
-                        
-                        btn = self.squares[gui_r][gui_c]
-                        if not btn:
-                            continue
-                        
-                        piece = board_state.piece_at(square)
-                        bg_color = CONFIG["board_colors"]["light"] if (gui_r + gui_c) % 2 == 0 else CONFIG["board_colors"]["dark"]
-                        
-                        if not self.review_mode:
-                            if self.selected_square and square == self.selected_square:
-                                bg_color = CONFIG["board_colors"]["selected"]
-                            elif self.selected_square:
-                                legal_moves = [m.to_square for m in self.chess_board.legal_moves 
-                                             if m.from_square == self.selected_square]
-                                if square in legal_moves:
-                                    bg_color = CONFIG["board_colors"]["legal_move"]
-                                    btn.config(text='●' if not piece else self.PIECES[piece.symbol()])
-                                else:
-                                    btn.config(text=self.PIECES.get(piece.symbol() if piece else '', ''))
-                            
-                            if self.last_move and square in [self.last_move[0], self.last_move[1]]:
-                                bg_color = CONFIG["board_colors"]["last_move"]
-                            
-                            if self.chess_board.is_check():
-                                king_square = self.chess_board.king(self.current_turn == 'white')
-                                if square == king_square:
-                                    bg_color = CONFIG["board_colors"]["check"]
-                        else:
-                            if self.current_review_move > 0:
-                                move = self.move_history[self.current_review_move - 1]['move']
-                                if square in [move.from_square, move.to_square]:
-                                    bg_color = CONFIG["board_colors"]["last_move"]
-                        
-                        btn.config(text=self.PIECES.get(piece.symbol() if piece else '', '') if square not in 
-                                  [m.to_square for m in self.chess_board.legal_moves if m.from_square == self.selected_square] else '●',
-                                  bg=bg_color)
+                # Work out everything that is the same for all 64 squares once per redraw
+                # Destination squares of the selected piece as a bitboard
+                legal_targets = 0
+                if self.selected_square is not None:
+                    for m in self._legal():
+                        if m.from_square == self.selected_square:
+                            legal_targets |= chess.BB_SQUARES[m.to_square]
+                highlighted = ()
+                king_square = None
+                if self.review_mode:
+                    if self.current_review_move > 0:
+                        move = self.move_history[self.current_review_move - 1]['move']
+                        highlighted = (move.from_square, move.to_square)
+                else:
+                    if self.last_move:
+                        highlighted = self.last_move
+                    if self.chess_board.is_check():
+                        king_square = self.chess_board.king(self.chess_board.turn)
+                white_side = self.player_side == 'white'
+                pieces = board_state.piece_map()  # Occupied squares only, fetched in one call
+                
+                for gui_r, gui_c, square in SQUARE_ORDER[white_side]:
+                    btn = self.squares[gui_r][gui_c]
+                    if not btn:
+                        continue
+                    
+                    piece = pieces.get(square)
+                    is_target = legal_targets & chess.BB_SQUARES[square]
+                    bg_color = CONFIG["board_colors"]["light"] if (gui_r + gui_c) % 2 == 0 else CONFIG["board_colors"]["dark"]
+                    
+                    if not self.review_mode:
+                        if square == self.selected_square:
+                            bg_color = CONFIG["board_colors"]["selected"]
+                        elif is_target:
+                            bg_color = CONFIG["board_colors"]["legal_move"]
+                    if square in highlighted:
+                        bg_color = CONFIG["board_colors"]["last_move"]
+                    if square == king_square:
+                        bg_color = CONFIG["board_colors"]["check"]
+                    
+                    text = '●' if is_target else (PIECE_GLYPHS[piece.piece_type + (0 if piece.color else 6)] if piece else '')
+                    
+                    # Only touch buttons whose look actually changed since the last redraw
+                    if self.square_state[gui_r][gui_c] != (text, bg_color):
+                        btn.config(text=text, bg=bg_color)
+                        self.square_state[gui_r][gui_c] = (text, bg_color)
         except Exception as e:
             logging.error(f"Update board error: {e}", exc_info=True)
             messagebox.showerror("Error", "Failed to update board")
@@ -1065,44 +1414,49 @@ class ChessVsAI:
     def update_eval_bar(self):
         """Update the evaluation bar based on current position."""
         try:
-            if not self.evaluations or self.current_review_move == 0:
-                self.eval_canvas.coords(self.eval_bar, 4, 50, 16, 50)
-                self.eval_label.config(text="0.00")
+            # current_review_move outlives review mode, so clamp it to the moves that still exist
+            ply = min(self.current_review_move, len(self.move_history))
+            if ply == 0:
+                self._set_eval_bar((4, 50, 16, 50), "0.00")
                 return
             
-            eval_index = min(self.current_review_move - 1, len(self.evaluations) - 1)
-            eval_score = self.evaluations[eval_index]
+            eval_score = self._position_analysis(ply - 1)[0]
             
             if eval_score is None:
-                self.eval_label.config(text="N/A")
-                self.eval_canvas.coords(self.eval_bar, 4, 50, 16, 50)
+                self._set_eval_bar((4, 50, 16, 50), "N/A")
                 return
             
             if isinstance(eval_score, str):
-                self.eval_label.config(text=eval_score)
                 if eval_score.startswith('M'):
-                    self.eval_canvas.coords(self.eval_bar, 4, 10, 16, 50)
-                    self.eval_canvas.itemconfig(self.eval_bar, fill='#ffffff')
+                    self._set_eval_bar((4, 10, 16, 50), eval_score, '#ffffff')
                 else:
-                    self.eval_canvas.coords(self.eval_bar, 4, 50, 16, 90)
-                    self.eval_canvas.itemconfig(self.eval_bar, fill='#000000')
+                    self._set_eval_bar((4, 50, 16, 90), eval_score, '#000000')
                 return
             
             score = max(min(float(eval_score), 5.0), -5.0)
             bar_height = int((score / 10.0) * 100)
+            text = f"{eval_score:+.2f}" if isinstance(eval_score, (int, float)) else str(eval_score)
             
             if score >= 0:
-                self.eval_canvas.coords(self.eval_bar, 4, 50 - bar_height, 16, 50)
-                self.eval_canvas.itemconfig(self.eval_bar, fill='#ffffff')
+                self._set_eval_bar((4, 50 - bar_height, 16, 50), text, '#ffffff')
             else:
-                self.eval_canvas.coords(self.eval_bar, 4, 50, 16, 50 - bar_height)
-                self.eval_canvas.itemconfig(self.eval_bar, fill='#000000')
-            
-            self.eval_label.config(text=f"{eval_score:+.2f}" if isinstance(eval_score, (int, float)) else str(eval_score))
+                self._set_eval_bar((4, 50, 16, 50 - bar_height), text, '#000000')
         except Exception as e:
             logging.error(f"Update eval bar error: {e}", exc_info=True)
             messagebox.showerror("Error", "Failed to update evaluation bar")
 
+    def _set_eval_bar(self, coords, text, fill=None):
+        """Apply bar coordinates, fill and label text, skipping whatever is already shown."""
+        if coords != self.eval_bar_state['coords']:
+            self.eval_canvas.coords(self.eval_bar, *coords)
+            self.eval_bar_state['coords'] = coords
+        if fill is not None and fill != self.eval_bar_state['fill']:
+            self.eval_canvas.itemconfig(self.eval_bar, fill=fill)
+            self.eval_bar_state['fill'] = fill
+        if text != self.eval_bar_state['text']:
+            self.eval_label.config(text=text)
+            self.eval_bar_state['text'] = text
+
     def update_status(self):
         """Update status and analysis text."""
         try:
@@ -1147,12 +1501,7 @@ class ChessVsAI:
             else:
                 move_num = (self.current_review_move + 1) // 2
                 color = 'White' if self.current_review_move % 2 == 1 else 'Black'
-                move = self.move_history[self.current_review_move - 1]['move']
-                prev_board = self.board_history[self.current_review_move - 1]
-                try:
-                    move_text = prev_board.san(move)
-                except:
-                    move_text = move.uci()
+                move_text = self.move_history[self.current_review_move - 1]['san']
                 
                 status = f"Review: Move {move_num} ({color}) - {move_text}"
             
@@ -1177,48 +1526,33 @@ class ChessVsAI:
     def update_move_list(self):
         """Update the move list panel with visual indication of commented moves."""
         try:
-            self.move_list_text.delete(1.0, tk.END)
-            self.move_list_text.tag_remove("highlight", "1.0", tk.END)
-            self.move_list_text.tag_remove("commented", "1.0", tk.END)
+            lines = []
+            commented = []  # (line, start column, end column) of each commented move
+            highlight_line = None
             
             for i in range(0, len(self.move_history), 2):
-                move_num = (i + 2) // 2
-                white_move = self.move_history[i]['move'] if i < len(self.move_history) else None
-                black_move = self.move_history[i + 1]['move'] if i + 1 < len(self.move_history) else None
-                board_before = self.board_history[i]
-                
-                line = f"{move_num}. "
-                if white_move:
-                    try:
-                        line += board_before.san(white_move)
-                    except:
-                        line += white_move.uci()
-                    if i in self.pgn_comments:
-                        line += " {*}"
-                if black_move:
-                    try:
-                        line += f" {board_before.san(black_move)}"
-                    except:
-                        line += f" {black_move.uci()}"
-                    if i + 1 in self.pgn_comments:
-                        line += " {*}"
-                line += "\n"
-                self.move_list_text.insert(tk.END, line)
+                line_num = i // 2 + 1
+                line = f"{line_num}. "
+                for ply in range(i, min(i + 2, len(self.move_history))):
+                    if ply > i:
+                        line += " "
+                    san = self.move_history[ply]['san']
+                    if ply in self.pgn_comments:
+                        commented.append((line_num, len(line), len(line) + len(san)))
+                        san += " {*}"
+                    line += san
+                lines.append(line + "\n")
                 
                 if self.review_mode and i // 2 == (self.current_review_move - 1) // 2:
-                    self.move_list_text.tag_add("highlight", f"{i//2 + 1}.0", f"{i//2 + 1}.end")
-                    self.move_list_text.tag_configure("highlight", background="#FFD700")
-                
-                # Highlight moves with comments
-                if i in self.pgn_comments:
-                    self.move_list_text.tag_add("commented", f"{i//2 + 1}.{len(str(move_num)) + 2}", 
-                                              f"{i//2 + 1}.{len(str(move_num)) + 2 + len(board_before.san(white_move))}")
-                    self.move_list_text.tag_configure("commented", foreground="#00FF00")
-                if i + 1 in self.pgn_comments and black_move:
-                    start_pos = len(str(move_num)) + 2 + len(board_before.san(white_move)) + 1
-                    self.move_list_text.tag_add("commented", f"{i//2 + 1}.{start_pos}", 
-                                              f"{i//2 + 1}.{start_pos + len(board_before.san(black_move))}")
-                    self.move_list_text.tag_configure("commented", foreground="#00FF00")
+                    highlight_line = line_num
+            
+            # Rewrite the widget with a single insert instead of one per move pair
+            self.move_list_text.delete(1.0, tk.END)
+            self.move_list_text.insert(tk.END, "".join(lines))
+            if highlight_line is not None:
+                self.move_list_text.tag_add("highlight", f"{highlight_line}.0", f"{highlight_line}.end")
+            for line_num, start, end in commented:
+                self.move_list_text.tag_add("commented", f"{line_num}.{start}", f"{line_num}.{end}")
         except Exception as e:
             logging.error(f"Update move list error: {e}", exc_info=True)
 
@@ -1233,55 +1567,52 @@ class ChessVsAI:
                 return
             
             move = self.move_history[self.current_review_move - 1]['move']
-            prev_board = self.board_history[self.current_review_move - 1]
-            try:
-                move_text = prev_board.san(move)
-            except:
-                move_text = move.uci()
+            move_text = self.move_history[self.current_review_move - 1]['san']
             
             move_num = (self.current_review_move + 1) // 2
             color = 'White' if self.current_review_move % 2 == 1 else 'Black'
-            self.analysis_text.insert(tk.END, f"Move {move_num} ({color}): {move_text}\n\n")
+            # Collect (text, tag) pairs and hand them to Tk in a single insert
+            parts = [f"Move {move_num} ({color}): {move_text}\n\n", ()]
             
-            if len(self.evaluations) > self.current_review_move - 1 and self.evaluations[self.current_review_move - 1] is not None:
-                curr_eval = self.evaluations[self.current_review_move - 1]
-                prev_eval = self.evaluations[self.current_review_move - 2] if self.current_review_move > 1 else 0.0
-                
+            curr_eval, best_move = self._position_analysis(self.current_review_move - 1)
+            prev_eval = self._position_analysis(self.current_review_move - 2)[0] if self.current_review_move > 1 else 0.0
+            if curr_eval is not None and prev_eval is not None:
                 if isinstance(curr_eval, str) or isinstance(prev_eval, str):
-                    self.analysis_text.insert(tk.END, "Mate position reached\n")
+                    parts += ["Mate position reached\n", ()]
                 else:
                     eval_change = curr_eval - prev_eval
                     if self.current_review_move % 2 == 0:
                         eval_change = -eval_change
                     
-                    self.analysis_text.insert(tk.END, f"Evaluation: {curr_eval:+.2f}\n")
+                    parts += [f"Evaluation: {curr_eval:+.2f}\n", ()]
                     
                     if abs(eval_change) > 2.0:
-                        self.analysis_text.insert(tk.END, f"⚠️ Blunder! ({eval_change:+.2f})\n")
+                        parts += [f"⚠️ Blunder! ({eval_change:+.2f})\n", ()]
                     elif abs(eval_change) > 1.0:
-                        self.analysis_text.insert(tk.END, f"❌ Mistake ({eval_change:+.2f})\n")
+                        parts += [f"❌ Mistake ({eval_change:+.2f})\n", ()]
                     elif abs(eval_change) > 0.5:
-                        self.analysis_text.insert(tk.END, f"⚡ Inaccuracy ({eval_change:+.2f})\n")
+                        parts += [f"⚡ Inaccuracy ({eval_change:+.2f})\n", ()]
                     elif abs(eval_change) < 0.1:
-                        self.analysis_text.insert(tk.END, "✅ Excellent move!\n")
+                        parts += ["✅ Excellent move!\n", ()]
             
-            if (len(self.best_moves) > self.current_review_move - 1 and 
-                self.best_moves[self.current_review_move - 1] and 
-                self.best_moves[self.current_review_move - 1] != move):
-                
-                best_move = self.best_moves[self.current_review_move - 1]
+            if best_move and best_move != move:
+                # Step the review board back one ply to name the alternative, then restore it
+                board = self._board_at(self.current_review_move)
+                board.pop()
                 try:
-                    best_move_text = prev_board.san(best_move)
-                    self.analysis_text.insert(tk.END, f"\nBest move was: {best_move_text}\n")
+                    best_move_text = board.san(best_move)
+                    parts += [f"\nBest move was: {best_move_text}\n", ()]
                 except:
                     pass
+                finally:
+                    board.push(move)
 
             if self.current_review_move - 1 in self.pgn_comments:
                 comment = self.pgn_comments[self.current_review_move - 1]
                 tag = "ai_comment" if comment.startswith("AI (Ollama):") else "user_comment"
-                self.analysis_text.insert(tk.END, f"\nComment: {comment}\n", tag)
-                self.analysis_text.tag_configure("ai_comment", foreground="#00B7EB", font=('Arial', CONFIG["font_sizes"]["analysis"], 'italic'))
-                self.analysis_text.tag_configure("user_comment", foreground="#00FF00", font=('Arial', CONFIG["font_sizes"]["analysis"], 'bold'))
+                parts += [f"\nComment: {comment}\n", tag]
+            
+            self.analysis_text.insert(tk.END, *parts)
             
             # Prompt for user comment after displaying analysis
             self.root.after(500, self.prompt_for_comment)
@@ -1291,129 +1622,167 @@ class ChessVsAI:
     def show_move_history(self):
         """Show recent move history."""
         try:
-            self.analysis_text.insert(tk.END, "Recent moves:\n\n")
+            parts = ["Recent moves:\n\n"]
             start_idx = max(0, len(self.move_history) - 10)
             
             for i in range(start_idx, len(self.move_history)):
-                move_data = self.move_history[i]
-                move = move_data['move']
-                board_before = self.board_history[i]
-                
-                try:
-                    san = board_before.san(move)
-                    move_num = (i + 2) // 2
-                    
-                    if i % 2 == 0:
-                        self.analysis_text.insert(tk.END, f"{move_num}. {san}")
-                    else:
-                        if i == len(self.move_history) - 1:
-                            self.analysis_text.insert(tk.END, f" {san}\n")
-                        else:
-                            self.analysis_text.insert(tk.END, f" {san}\n")
-                except Exception as e:
-                    logging.error(f"Error generating SAN for move {move.uci()}: {e}", exc_info=True)
-                    continue
+                san = self.move_history[i]['san']
+                if i % 2 == 0:
+                    parts.append(f"{(i + 2) // 2}. {san}")
+                else:
+                    parts.append(f" {san}\n")
+            self.analysis_text.insert(tk.END, "".join(parts))
         except Exception as e:
             logging.error(f"Show move history error: {e}", exc_info=True)
 
-    @lru_cache(maxsize=CONFIG["transposition_table_size"])
-    def cached_ollama_move(self, fen):
-        """Cached helper for Ollama move generation with explanation."""
+    def get_ollama_client(self):
+        """Return the shared Ollama client, importing the package on first use."""
+        if self.ollama_client is None:
+            import ollama
+            self.ollama_client = ollama.Client(timeout=self.ollama_timeout)
+        return self.ollama_client
+
+    def stream_ollama(self, prompt):
+        """Yield response text from Ollama as it is generated, stopping early if the window closes.
+
+        The HTTP request is made by a single daemon reader thread, so a read stuck waiting on
+        the server (e.g. while the model loads) can't keep the process alive after exit.
+        """
+        if self.ollama_reader is None:
+            self.ollama_reader = threading.Thread(target=self._ollama_reader, name='ollama-read', daemon=True)
+            self.ollama_reader.start()
+        
+        chunks = queue.SimpleQueue()
+        done = threading.Event()  # Set by the consumer to make the reader drop the response
+        self.ollama_requests.put((prompt, chunks, done))
+        try:
+            while not self.closing:
+                try:
+                    item = chunks.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            done.set()
+
+    def _ollama_reader(self):
+        """Serve stream_ollama requests one at a time for the life of the app."""
+        while True:
+            prompt, chunks, done = self.ollama_requests.get()
+            if done.is_set():
+                continue  # The caller gave up before the request started
+            try:
+                stream = self.get_ollama_client().generate(
+                    model=self.ollama_model,
+                    prompt=prompt,
+                    stream=True,
+                    keep_alive=CONFIG["ollama"]["keep_alive"],  # Keep the model loaded between moves
+                    options={
+                        'temperature': CONFIG["ollama"]["temperature"],
+                        'top_p': CONFIG["ollama"]["top_p"],
+                        'num_predict': CONFIG["ollama"]["num_predict"] + 50,  # Increased for explanation
+                        'num_ctx': CONFIG["ollama"]["num_ctx"]  # Prompt is a few hundred tokens; a smaller KV cache decodes faster
+                    }
+                )
+                try:
+                    for chunk in stream:
+                        if done.is_set():
+                            break
+                        chunks.put(chunk["response"])
+                finally:
+                    stream.close()  # Closes the HTTP response so the server stops generating
+            except Exception as e:
+                chunks.put(e)
+            chunks.put(None)
+
+    def query_ollama_move(self, fen):
+        """Ask Ollama for a move and explanation for the given position."""
         try:
             legal_moves = [move.uci() for move in self.chess_board.legal_moves]
+            legal_set = frozenset(legal_moves)
             side = 'White' if self.current_turn == 'white' else 'Black'
-            recent_moves = ' '.join(board_before.san(move_data['move']) 
-                                  for move_data, board_before in 
-                                  zip(self.move_history[-3:], self.board_history[-4:-1]))
-            
-            prompt = (
-                f"You are playing chess as {side}.\n"
-                f"Current position (FEN): {fen}\n"
-                f"Recent moves: {recent_moves or 'None'}\n"
-                f"Legal moves in UCI format: {', '.join(legal_moves) if legal_moves else 'None'}\n"
-                f"Your task is to select the best legal move for {side} and explain why it is the best move in 1-2 sentences.\n"
-                f"Respond in the format:\n"
-                f"Move: <UCI move>\n"
-                f"Explanation: <1-2 sentence explanation>\n"
-                f"Example:\n"
-                f"Move: e2e4\n"
-                f"Explanation: This move controls the center and opens lines for the queen and bishop.\n"
-                f"Do NOT include additional text or punctuation outside this format."
-            )
+            recent_moves = ' '.join(move_data['san'] for move_data in self.move_history[-3:])
             
-            if self.current_turn == 'white':
-                prompt += "\nConsider common opening moves like e4, d4, Nf3, c4."
-            else:
-                prompt += "\nConsider common responses like e5, e6, c5, d5, Nf6."
-            
-            uci_pattern = r'^[a-h][1-8][a-h][1-8][qrbn]?$'  # Matches UCI moves, including castling
+            prompt = OLLAMA_PROMPT.format(
+                side=side,
+                fen=fen,
+                recent_moves=recent_moves or 'None',
+                legal_moves=', '.join(legal_moves) if legal_moves else 'None'
+            )
             
             for attempt in range(3):
+                if self.closing:
+                    break
                 try:
-                    response = ollama.generate(
-                        model=self.ollama_model,
-                        prompt=prompt,
-                        options={
-                            'temperature': CONFIG["ollama"]["temperature"],
-                            'top_p': CONFIG["ollama"]["top_p"],
-                            'num_predict': CONFIG["ollama"]["num_predict"] + 50,  # Increased for explanation
-                            'timeout': self.ollama_timeout
-                        }
-                    )
+                    # Stop decoding as soon as the move and a complete explanation line are in
+                    response_text = ""
+                    stream = self.stream_ollama(prompt)
+                    try:
+                        for text in stream:
+                            response_text += text
+                            if MOVE_RE.search(response_text) and EXPLANATION_LINE_RE.search(response_text):
+                                break
+                    finally:
+                        stream.close()
+                    if self.closing:
+                        break
                     
-                    response_text = response["response"].strip()
-                    self.debug_text.delete(1.0, tk.END)
-                    self.debug_text.insert(tk.END, f"Attempt {attempt + 1}: {response_text}\n")
+                    response_text = response_text.strip()
+                    self.show_debug(f"Attempt {attempt + 1}: {response_text}\n", clear=True)
                     
                     # Parse response for move and explanation
-                    move_match = re.search(r'Move: ([a-h][1-8][a-h][1-8][qrbn]?)\n', response_text)
-                    explanation_match = re.search(r'Explanation: (.+?)(?:\n|$)', response_text, re.DOTALL)
+                    move_match = MOVE_RE.search(response_text)
+                    explanation_match = EXPLANATION_RE.search(response_text)
                     
                     if not move_match:
-                        self.debug_text.insert(tk.END, f"Invalid response format: {response_text}\n")
+                        self.show_debug(f"Invalid response format: {response_text}\n")
                         logging.warning(f"Ollama attempt {attempt + 1} failed: Invalid response format")
                         continue
                     
                     move_str = move_match.group(1).strip()
                     explanation = explanation_match.group(1).strip() if explanation_match else "No explanation provided."
                     
-                    if not re.match(uci_pattern, move_str):
-                        self.debug_text.insert(tk.END, f"Invalid UCI format: {move_str}\n")
-                        logging.warning(f"Ollama attempt {attempt + 1} failed: Invalid UCI format {move_str}")
-                        continue
-                    
-                    move = chess.Move.from_uci(move_str)
-                    if move in self.chess_board.legal_moves:
-                        self.debug_text.insert(tk.END, f"Valid move: {move_str}\nExplanation: {explanation}\n")
+                    if move_str in legal_set:
+                        self.show_debug(f"Valid move: {move_str}\nExplanation: {explanation}\n")
                         return move_str, explanation
                     else:
-                        self.debug_text.insert(tk.END, f"Move not legal: {move_str}\n")
+                        self.show_debug(f"Move not legal: {move_str}\n")
                         logging.warning(f"Ollama attempt {attempt + 1} failed: Move {move_str} not in legal moves")
                 
                 except Exception as e:
                     logging.error(f"Ollama attempt {attempt + 1} error: {e}", exc_info=True)
-                    self.debug_text.insert(tk.END, f"Error: {str(e)}\n")
+                    self.show_debug(f"Error: {str(e)}\n")
                 
-                if attempt < 2:
+                if attempt < 2 and not self.closing:
                     time.sleep(2 ** attempt)  # Exponential backoff
             
-            self.debug_text.insert(tk.END, "No valid move found, falling back\n")
+            self.show_debug("No valid move found, falling back\n")
             return None, "No valid move found."
         except Exception as e:
-            logging.error(f"Cached Ollama move error: {e}", exc_info=True)
+            logging.error(f"Query Ollama move error: {e}", exc_info=True)
             return None, str(e)
 
     def get_ollama_move(self):
-        """Get move and explanation from Ollama with caching."""
+        """Get move and explanation from Ollama, cached by Zobrist hash."""
         try:
             with self.board_lock:
-                fen = self.chess_board.fen()
-                result = self.cached_ollama_move(fen)
+                key = chess.polyglot.zobrist_hash(self.chess_board)
+                result = self.tt_lookup(key)
+                if result is None:
+                    result = self.query_ollama_move(self.chess_board.fen())
+                    if result and result[0]:
+                        self.tt_store(key, result)
+                else:
+                    logging.debug("Transposition table hit for %s", result[0])
                 if result and result[0]:
                     move = chess.Move.from_uci(result[0])
                     if move in self.chess_board.legal_moves:
                         # Store explanation as a comment if AI makes this move
-                        if result[1] and self.current_turn != self.player_side:
+                        if result[1] and self.chess_board.turn != self.player_color:
                             self.pgn_comments[len(self.move_history)] = f"AI (Ollama): {result[1]}"
                         return move
                 return None
@@ -1422,43 +1791,174 @@ class ChessVsAI:
             return None
 
     def get_opening_move(self):
-        """Get move from opening book if available."""
+        """Get a weighted random move from the opening book if the position is in it."""
         try:
-            if os.path.exists(CONFIG["paths"]["openings"]):
-                with chess.polyglot.open_reader(CONFIG["paths"]["openings"]) as reader:
-                    entry = reader.find(self.chess_board)
-                    return entry.move
-            return None
+            if not self.opening_book:
+                return None
+            return self.opening_book.weighted_choice(self.chess_board).move
+        except IndexError:
+            return None  # Out of book
         except Exception as e:
             logging.error(f"Opening book error: {e}", exc_info=True)
             return None
 
-    def get_stockfish_move(self):
-        """Get move from Stockfish engine."""
+    def get_stockfish_move(self, board=None, stop=None):
+        """Get move from Stockfish, reusing the analysis already run on this position.
+
+        `board` is a private copy of the position; without one the current board is copied.
+        Setting the optional `stop` event abandons the search and returns None.
+        """
         try:
             if not self.engine:
                 return None
             
-            with self.board_lock:
-                time_limit = CONFIG["stockfish"][self.ai_difficulty]["time"]
-                depth = CONFIG["stockfish"][self.ai_difficulty]["depth"]
-                result = self.engine.play(
-                    self.chess_board,
-                    chess.engine.Limit(time=time_limit, depth=depth)
-                )
-                return result.move
+            if board is None:
+                with self.board_lock:
+                    board = self.chess_board.copy()
+            
+            # make_move analyses every new position with the same limits, so its
+            # principal variation is already the engine's answer for this turn
+            key = (chess.polyglot.zobrist_hash(board), self.ai_difficulty)
+            time_limit = CONFIG["stockfish"][self.ai_difficulty]["time"]
+            depth = CONFIG["stockfish"][self.ai_difficulty]["depth"]
+            with self.engine_lock:
+                # Checked under the lock so a background evaluation that was still running counts
+                cached = self.eval_cache.get(key)
+                if cached and cached[1] and board.is_legal(cached[1]):
+                    return cached[1]
+                if self.closing or (stop is not None and stop.is_set()):
+                    return None
+                # Searched as an analysis rather than play() so it can be stopped between info lines
+                with self.engine.analysis(board, chess.engine.Limit(time=time_limit, depth=depth)) as analysis:
+                    for _ in analysis:
+                        if self.closing or (stop is not None and stop.is_set()):
+                            return None  # Leaving the block sends "stop" to the engine
+                    return analysis.wait().move
         except Exception as e:
             logging.error(f"Stockfish error: {e}", exc_info=True)
             return None
 
+    def get_search_move(self):
+        """Pick a move with a shallow alpha-beta search, deepening until the time budget runs out."""
+        try:
+            with self.board_lock:
+                board = self.chess_board.copy()
+            
+            deadline = time.time() + CONFIG["search"]["time"]
+            table = {}  # Zobrist key -> (depth, score, bound, best move), shared across iterations
+            best_move = None
+            for depth in range(1, CONFIG["search"]["max_depth"] + 1):
+                try:
+                    best_move = self._search_root(board, depth, deadline, best_move, table)
+                except SearchTimeout:
+                    break
+                logging.debug("Search depth %d best move %s", depth, best_move)
+            return best_move
+        except Exception as e:
+            logging.error(f"Search move error: {e}", exc_info=True)
+            return None
+
+    def _search_root(self, board, depth, deadline, pv_move, table):
+        """Return the best move at `depth`, trying the previous iteration's best move first."""
+        moves = self._order_moves(board, list(board.legal_moves))
+        if pv_move in moves:
+            moves.remove(pv_move)
+            moves.insert(0, pv_move)
+        
+        best_move = moves[0] if moves else None
+        alpha = -SEARCH_INF
+        for move in moves:
+            board.push(move)
+            try:
+                score = -self._alphabeta(board, depth - 1, -SEARCH_INF, -alpha, deadline, table)
+            finally:
+                board.pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return best_move
+
+    def _alphabeta(self, board, depth, alpha, beta, deadline, table):
+        """Negamax alpha-beta with a transposition table; scores are from the side to move's point of view."""
+        if time.time() > deadline:
+            raise SearchTimeout()
+        
+        # Hashing costs more than it saves right above the leaves, so only interior nodes use the table
+        key = chess.polyglot.zobrist_hash(board) if depth >= 2 else None
+        entry = table.get(key) if key is not None else None
+        tt_move = None
+        if entry:
+            entry_depth, entry_score, bound, tt_move = entry
+            if entry_depth >= depth:
+                if bound == TT_EXACT:
+                    return entry_score
+                if bound == TT_LOWER and entry_score >= beta:
+                    return entry_score
+                if bound == TT_UPPER and entry_score <= alpha:
+                    return entry_score
+        
+        moves = list(board.legal_moves)
+        if not moves:
+            # Prefer quicker mates by scoring them higher the more depth is left
+            return -MATE_SCORE - depth if board.is_check() else 0
+        if depth == 0:
+            return self.evaluate_material(board)
+        
+        moves = self._order_moves(board, moves)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        
+        alpha_orig = alpha
+        best_score = -SEARCH_INF
+        best_move = None
+        for move in moves:
+            board.push(move)
+            try:
+                score = -self._alphabeta(board, depth - 1, -beta, -alpha, deadline, table)
+            finally:
+                board.pop()
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        
+        if best_score <= alpha_orig:
+            bound = TT_UPPER
+        elif best_score >= beta:
+            bound = TT_LOWER
+        else:
+            bound = TT_EXACT
+        if key is not None:
+            table[key] = (depth, best_score, bound, best_move)
+        return best_score
+
+    def _order_moves(self, board, moves):
+        """Sort captures first, most valuable victim then least valuable attacker (MVV-LVA)."""
+        def key(move):
+            victim = board.piece_type_at(move.to_square)
+            if victim is None:
+                return 1 if move.promotion else 0
+            return 10 * PIECE_VALUES[victim] - PIECE_VALUES[board.piece_type_at(move.from_square)]
+        return sorted(moves, key=key, reverse=True)
+
+    def evaluate_material(self, board):
+        """Material balance in centipawns from the side to move's point of view."""
+        score = 0
+        for piece_type in range(chess.PAWN, chess.KING):
+            score += PIECE_VALUES[piece_type] * (chess.popcount(board.pieces_mask(piece_type, chess.WHITE))
+                                                 - chess.popcount(board.pieces_mask(piece_type, chess.BLACK)))
+        return score if board.turn else -score
+
     def get_random_move(self):
         """Get random legal move as last resort."""
         try:
             with self.board_lock:
-                legal_moves = list(self.chess_board.legal_moves)
-                if legal_moves:
-                    return random.choice(legal_moves)
-                return None
+                legal_moves = self._legal()
+                return random.choice(legal_moves) if legal_moves else None
         except Exception as e:
             logging.error(f"Get random move error: {e}", exc_info=True)
             return None
@@ -1467,7 +1967,7 @@ class ChessVsAI:
         """Handle AI move generation in a separate thread."""
         try:
             if (self.game_over or 
-                self.current_turn == self.player_side or 
+                self.chess_board.turn == self.player_color or 
                 self.review_mode or 
                 self.ai_thinking):
                 return
@@ -1479,61 +1979,72 @@ class ChessVsAI:
             def get_ai_move():
                 start_time = time.time()
                 move = None
+                stockfish_future = None
+                stockfish_stop = threading.Event()
                 
                 try:
-                    # Try opening book first
-                    if len(self.move_history) < 10:
-                        move = self.get_opening_move()
-                        if move:
-                            self.debug_text.delete(1.0, tk.END)
-                            self.debug_text.insert(tk.END, f"Opening move: {move.uci()}\n")
+                    # Try opening book first; the lookup is cheap, so ask until it runs out of theory
+                    move = self.get_opening_move()
+                    if move:
+                        self.show_debug(f"Opening move: {move.uci()}\n", clear=True)
                     
-                    # Try Ollama
+                    # Try Ollama, with Stockfish working on its fallback answer in parallel
                     if not move:
+                        if self.engine:
+                            with self.board_lock:
+                                board = self.chess_board.copy()
+                            stockfish_future = self.ai_executor.submit(self.get_stockfish_move, board, stockfish_stop)
                         move = self.get_ollama_move()
                         if move:
-                            logging.info(f"Ollama move: {move.uci()}")
+                            logging.info("Ollama move: %s", move)
+                            if stockfish_future:
+                                # The standby search is no longer needed; free the engine and its CPU
+                                stockfish_stop.set()
+                                stockfish_future.cancel()
                         else:
                             raise ChessError("Ollama failed to provide valid move")
                 
                 except Exception as e:
+                    if self.closing:
+                        stockfish_stop.set()
+                        return
                     logging.error(f"Ollama failed: {e}", exc_info=True)
-                    self.debug_text.delete(1.0, tk.END)
-                    self.debug_text.insert(tk.END, f"Ollama error: {str(e)}\nFalling back to Stockfish/random\n")
+                    self.show_debug(f"Ollama error: {str(e)}\nFalling back to Stockfish/search\n", clear=True)
                     
-                    if self.engine:
+                    if stockfish_future:
                         try:
-                            move = self.get_stockfish_move()
-                            logging.info(f"Stockfish move: {move.uci()}")
-                            self.debug_text.insert(tk.END, f"Stockfish move: {move.uci()}\n")
+                            move = stockfish_future.result()
+                            logging.info("Stockfish move: %s", move.uci())
+                            self.show_debug(f"Stockfish move: {move.uci()}\n")
                         except Exception as e2:
                             logging.error(f"Stockfish failed: {e2}", exc_info=True)
-                            self.debug_text.insert(tk.END, f"Stockfish error: {str(e2)}\nFalling back to random\n")
-                            move = self.get_random_move()
-                    else:
+                            self.show_debug(f"Stockfish error: {str(e2)}\nFalling back to search\n")
+                            move = None
+                    
+                    if not move:
+                        move = self.get_search_move()
+                        self.show_debug(f"Search move: {move.uci() if move else 'None'}\n")
+                    if not move:
                         move = self.get_random_move()
-                        self.debug_text.insert(tk.END, f"Random move: {move.uci() if move else 'None'}\n")
+                        self.show_debug(f"Random move: {move.uci() if move else 'None'}\n")
                 
                 def execute_move():
                     try:
                         self.ai_thinking = False
                         self.root.config(cursor="")
                         if move and self.make_move(move):
-                            self.update_board()
-                            self.update_status()
-                            self.update_eval_bar()
-                            self.update_move_list()
+                            self._refresh_all()
                             self.check_game_end()
                         
-                        logging.info(f"AI move took {time.time() - start_time:.2f} seconds")
+                        logging.info("AI move took %.2f seconds", time.time() - start_time)
                     except Exception as e:
                         logging.error(f"Execute AI move error: {e}", exc_info=True)
                         self.root.config(cursor="")
                         messagebox.showerror("Error", "Failed to execute AI move")
                 
-                self.root.after(0, execute_move)
+                self.post_to_ui(execute_move)
             
-            threading.Thread(target=get_ai_move, daemon=True).start()
+            self.ai_executor.submit(get_ai_move)
         except Exception as e:
             logging.error(f"AI move error: {e}", exc_info=True)
             self.ai_thinking = False
@@ -1551,7 +2062,7 @@ class ChessVsAI:
             self.setup_control_buttons()
             
             if self.player_side == 'black':
-                self.root.after(1000, self.ai_move)
+                self.root.after_idle(self.ai_move)
         except Exception as e:
             logging.error(f"New game error: {e}", exc_info=True)
             messagebox.showerror("Error", "Failed to start new game")
@@ -1564,6 +2075,7 @@ class ChessVsAI:
                 return
                 
             self.player_side = 'black' if self.player_side == 'white' else 'white'
+            self.player_color = self.player_side == 'white'
             self.new_game()
         except Exception as e:
             logging.error(f"Switch side error: {e}", exc_info=True)
@@ -1572,6 +2084,7 @@ class ChessVsAI:
     def run(self):
         """Run the Tkinter application."""
         try:
+            self.drain_ui_queue()
             self.root.mainloop()
         except KeyboardInterrupt:
             logging.info("Application interrupted")
@@ -1585,9 +2098,8 @@ def main():
     try:
         required_modules = ['chess', 'ollama', 'dotenv']
         for module in required_modules:
-            try:
-                __import__(module)
-            except ImportError:
+            # find_spec checks availability without paying for the import itself
+            if importlib.util.find_spec(module) is None:
                 logging.error(f"Required module '{module}' not found. Please install it using: pip install {module}")
                 return
         